@@ -0,0 +1,103 @@
+"""
+Compare JSON, MessagePack and Arrow IPC bodies for GET /tasks/.
+
+For each format this measures what the server does per request (fetch rows
+and encode the body), the payload size, and what a client spends decoding it.
+JSON goes through the existing ORM + pydantic path; the binary formats are
+built straight from DB rows. Decoded JSON still holds datetimes as strings,
+so its decode time is a lower bound.
+
+    python benchmarks/bench_formats.py --rows 100000
+"""
+from datetime import datetime, timedelta
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+from typing import List
+import argparse
+import io
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import crud
+import formats
+import schemas
+from database import Base
+from models import Task, TaskStatus
+
+# Same encoding as the JSON branch of main.read_tasks
+task_list_adapter = TypeAdapter(List[schemas.TaskResponse])
+
+def seed(db: Session, count: int) -> None:
+    statuses = list(TaskStatus)
+    start = datetime(2025, 1, 1, 9, 0)
+    rows = [
+        {
+            "title": f"Review case bundle {i}",
+            "description": None if i % 3 else f"Check exhibits and witness statements for case {i}",
+            "status": statuses[i % len(statuses)],
+            "due_date": start + timedelta(minutes=i),
+        }
+        for i in range(count)
+    ]
+    for offset in range(0, count, 10000):
+        db.execute(insert(Task), rows[offset:offset + 10000])
+    db.commit()
+
+def best_of(repeat: int, fn):
+    """Return (fastest wall time, last result) over repeat runs"""
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+def encode_json(db: Session, limit: int) -> bytes:
+    tasks = crud.get_tasks(db, limit=limit)
+    return task_list_adapter.dump_json(task_list_adapter.validate_python(tasks, from_attributes=True))
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    with Session(engine) as db:
+        seed(db, args.rows)
+
+    cases = [
+        ("json", lambda db: encode_json(db, args.rows), json.loads),
+        ("msgpack",
+         lambda db: formats.encode_rows(crud.get_task_rows(db, limit=args.rows), formats.MSGPACK),
+         lambda body: formats.msgpack.unpackb(body, timestamp=3)),
+        ("arrow",
+         lambda db: formats.encode_rows(crud.get_task_rows(db, limit=args.rows), formats.ARROW),
+         lambda body: formats.pa.ipc.open_stream(io.BytesIO(body)).read_all()),
+    ]
+
+    print(f"{args.rows} rows, best of {args.repeat}")
+    print(f"{'format':<8} {'fetch+encode (s)':>17} {'size (MB)':>10} {'decode (s)':>11}")
+    for name, encode, decode in cases:
+        if name == "msgpack" and formats.msgpack is None or name == "arrow" and formats.pa is None:
+            print(f"{name:<8} {'(not installed)':>17}")
+            continue
+
+        def run():
+            # A fresh session per run so the ORM identity map does not help JSON
+            with Session(engine) as db:
+                return encode(db)
+
+        encode_time, body = best_of(args.repeat, run)
+        decode_time, _ = best_of(args.repeat, lambda: decode(body))
+        print(f"{name:<8} {encode_time:>17.3f} {len(body) / 1e6:>10.2f} {decode_time:>11.3f}")
+
+if __name__ == "__main__":
+    main()
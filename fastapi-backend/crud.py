@@ -1,28 +1,83 @@
+from sqlalchemy import func, insert, or_, select, update
+from sqlalchemy.engine import Row
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
-from models import Task
+from models import ImportFormat, ImportJob, ImportJobRow, ImportRowError, ImportStatus, Task
 from schemas import TaskCreate, TaskUpdate
-from typing import List, Optional
+from datetime import timedelta
+from typing import Iterator, List, Optional, Set
+from singleflight import SingleFlight
+
+# Identical concurrent task reads share one query. Every write below commits
+# inside task_reads.writing(): reads arriving during the commit run on their
+# own, and reads in flight are forgotten once it returns, so a read that starts
+# after the commit never joins one that started before it. This only reaches
+# readers in this process: other workers or instances may still finish a read
+# that began before the write, so their responses can trail it by one query.
+task_reads = SingleFlight()
 
 def get_task(db: Session, task_id: int) -> Optional[Task]:
     """Retrieve a task by ID"""
-    return db.query(Task).filter(Task.id == task_id).first()
+    # Primary-key lookup lets a sharded session go straight to the owning shard
+    return db.get(Task, task_id)
+
+def get_tasks(db: Session, skip: int = 0, limit: int = 100, after_id: Optional[int] = None) -> List[Task]:
+    """Retrieve tasks ordered by ID, paging by offset and/or an after_id cursor"""
+    query = db.query(Task).order_by(Task.id)
+    if after_id is not None:
+        query = query.filter(Task.id > after_id)
+    shard_router = db.info.get("shard_router")
+    if shard_router is not None:
+        # Each shard returns its first skip+limit rows past the cursor; merge and
+        # page globally. Deep offsets cost every shard, so prefer the cursor.
+        return shard_router.merge_sorted(
+            lambda shard_db: query.with_session(shard_db).limit(skip + limit).all(),
+            key=lambda task: task.id,
+            skip=skip,
+            limit=limit,
+        )
+    return query.offset(skip).limit(limit).all()
+
+# Columns served to bulk consumers, in formats.TASK_FIELDS order
+TASK_COLUMNS = (Task.id, Task.title, Task.description, Task.status, Task.due_date, Task.created_at, Task.updated_at)
+
+def get_task_rows(db: Session, skip: int = 0, limit: int = 100, after_id: Optional[int] = None) -> List[Row]:
+    """Retrieve tasks as plain rows rather than ORM objects, ordered by ID"""
+    query = select(*TASK_COLUMNS).order_by(Task.id)
+    if after_id is not None:
+        query = query.where(Task.id > after_id)
+    shard_router = db.info.get("shard_router")
+    if shard_router is not None:
+        return shard_router.merge_sorted(
+            lambda shard_db: shard_db.execute(query.limit(skip + limit)).all(),
+            key=lambda row: row.id,
+            skip=skip,
+            limit=limit,
+        )
+    return db.execute(query.offset(skip).limit(limit)).all()
 
-def get_tasks(db: Session, skip: int = 0, limit: int = 100) -> List[Task]:
-    """Retrieve all tasks with pagination"""
-    return db.query(Task).offset(skip).limit(limit).all()
+def iter_task_rows(db: Session, batch_size: int = 10000) -> Iterator[List[Row]]:
+    """Walk every task in ID order, one batch of rows at a time (keyset pagination)"""
+    after_id = None
+    while True:
+        rows = get_task_rows(db, limit=batch_size, after_id=after_id)
+        if not rows:
+            return
+        yield rows
+        after_id = rows[-1].id
 
 def create_task(db: Session, task: TaskCreate) -> Task:
     """Create a new task"""
     db_task = Task(**task.model_dump())
     db.add(db_task)
-    db.commit()
+    with task_reads.writing():
+        db.commit()
     db.refresh(db_task)
     return db_task
 
 def update_task(db: Session, task_id: int, task_update: TaskUpdate) -> Optional[Task]:
     """Update an existing task"""
-    db_task = db.query(Task).filter(Task.id == task_id).first()
+    db_task = get_task(db, task_id)
     if not db_task:
         return None
     
@@ -30,16 +85,109 @@ def update_task(db: Session, task_id: int, task_update: TaskUpdate) -> Optional[
     for field, value in update_data.items():
         setattr(db_task, field, value)
     
-    db.commit()
+    with task_reads.writing():
+        db.commit()
     db.refresh(db_task)
     return db_task
 
 def delete_task(db: Session, task_id: int) -> bool:
     """Delete a task"""
-    db_task = db.query(Task).filter(Task.id == task_id).first()
+    db_task = get_task(db, task_id)
     if not db_task:
         return False
     
     db.delete(db_task)
+    with task_reads.writing():
+        db.commit()
+    return True
+
+def bulk_insert_tasks(
+    db: Session,
+    tasks: List[TaskCreate],
+    import_job_id: Optional[int] = None,
+    row_numbers: Optional[List[int]] = None,
+) -> int:
+    """
+    Insert many tasks with a single executemany per database; the caller commits.
+    With import_job_id, each task's source row is recorded alongside it.
+    """
+    rows = [task.model_dump() for task in tasks]
+    if not rows:
+        return 0
+    shard_router = db.info.get("shard_router")
+    if shard_router is None:
+        _insert_tasks(db, rows, import_job_id, row_numbers)
+        return len(rows)
+    # ORM bulk inserts cannot route per row, so assign IDs and insert per shard
+    for row in rows:
+        row["id"] = shard_router.id_generator.next_id()
+    for shard_id, indexes in shard_router.group_by_shard(range(len(rows)), key=lambda i: rows[i]["id"]).items():
+        _insert_tasks(
+            db.connection(bind_arguments={"shard_id": shard_id}),
+            [rows[i] for i in indexes],
+            import_job_id,
+            row_numbers and [row_numbers[i] for i in indexes],
+        )
+    return len(rows)
+
+def _insert_tasks(conn, rows: List[dict], import_job_id: Optional[int], row_numbers: Optional[List[int]]) -> None:
+    conn.execute(insert(Task.__table__), rows)
+    if import_job_id is not None:
+        conn.execute(
+            insert(ImportJobRow.__table__),
+            [{"job_id": import_job_id, "row_number": row_number} for row_number in row_numbers],
+        )
+
+def get_imported_row_numbers(db: Session, job_id: int, first_row: int, last_row: int) -> Set[int]:
+    """Source rows in [first_row, last_row] that an import job has already written"""
+    query = select(ImportJobRow.row_number).where(
+        ImportJobRow.job_id == job_id,
+        ImportJobRow.row_number.between(first_row, last_row),
+    )
+    return set(db.execute(query).scalars())
+
+def create_import_job(
+    db: Session, filename: str, file_format: ImportFormat, file_size: int, file_sha256: str
+) -> ImportJob:
+    """Create a new import job"""
+    db_job = ImportJob(filename=filename, format=file_format, file_size=file_size, file_sha256=file_sha256)
+    db.add(db_job)
     db.commit()
-    return True
\ No newline at end of file
+    db.refresh(db_job)
+    return db_job
+
+def claim_import_job(db: Session, job_id: int, stale_after: timedelta) -> bool:
+    """
+    Atomically mark a job RUNNING if it failed, or if it is RUNNING but has made
+    no progress for stale_after (its worker died). Returns False if another
+    worker holds it or it already completed.
+    """
+    # Use the database clock, which is what stamps updated_at
+    stale_before = db.scalar(select(func.now())) - stale_after
+    result = db.execute(
+        update(ImportJob)
+        .where(
+            ImportJob.id == job_id,
+            or_(
+                ImportJob.status == ImportStatus.FAILED,
+                (ImportJob.status == ImportStatus.RUNNING) & (ImportJob.updated_at < stale_before),
+            ),
+        )
+        .values(status=ImportStatus.RUNNING, error_message=None),
+        execution_options={"synchronize_session": False},
+    )
+    db.commit()
+    return result.rowcount == 1
+
+def get_import_job(db: Session, job_id: int) -> Optional[ImportJob]:
+    """Retrieve an import job by ID"""
+    return db.get(ImportJob, job_id)
+
+def get_import_errors(db: Session, job_id: int) -> Iterator[ImportRowError]:
+    """Stream the per-row errors of an import job in source order"""
+    return (
+        db.query(ImportRowError)
+        .filter(ImportRowError.job_id == job_id)
+        .order_by(ImportRowError.row_number)
+        .yield_per(1000)
+    )
\ No newline at end of file
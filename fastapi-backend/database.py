@@ -3,14 +3,36 @@ from sqlalchemy.orm import sessionmaker, declarative_base
 from sqlalchemy.pool import StaticPool
 import os
 from dotenv import load_dotenv
+from sharding import IdGenerator, ShardRouter, create_shard_engines
 
 # Load environment variables
 load_dotenv()
 
 # Database configuration
 DATABASE_URL = os.getenv("DATABASE_URL")
+# Comma-separated URLs; when set, tasks are spread across these databases
+SHARD_DATABASE_URLS = os.getenv("SHARD_DATABASE_URLS")
+# Embedded in generated task IDs; must differ between every process sharing the shards
+SHARD_WORKER_ID = os.getenv("SHARD_WORKER_ID")
+# Threads shared by all requests for parallel shard queries (default: 16 per shard)
+SHARD_POOL_SIZE = int(os.getenv("SHARD_POOL_SIZE", "0")) or None
 
-if DATABASE_URL:
+shard_router = None
+
+if SHARD_DATABASE_URLS:
+    # Two processes with the same worker ID generate the same IDs within a millisecond
+    if not SHARD_WORKER_ID:
+        raise RuntimeError(
+            "SHARD_WORKER_ID must be set when SHARD_DATABASE_URLS is set, "
+            "with a different value for every backend process"
+        )
+    # Horizontally sharded tasks table, routed by hashed task ID
+    shard_router = ShardRouter(
+        create_shard_engines(SHARD_DATABASE_URLS.split(",")),
+        IdGenerator(worker_id=int(SHARD_WORKER_ID)),
+        max_workers=SHARD_POOL_SIZE,
+    )
+elif DATABASE_URL:
     # Production/Docker environment with MySQL
     engine = create_engine(DATABASE_URL)
 else:
@@ -22,8 +44,13 @@ else:
         poolclass=StaticPool,
     )
 
-# Create SessionLocal class
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+if shard_router is not None:
+    engines = list(shard_router.shards.values())
+    SessionLocal = shard_router.sessionmaker()
+else:
+    engines = [engine]
+    # Create SessionLocal class
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 # Create Base class using the new import
 Base = declarative_base()
@@ -34,4 +61,8 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+def get_session_factory():
+    """Session factory for work that outlives the request, e.g. background imports"""
+    return SessionLocal
\ No newline at end of file
@@ -0,0 +1,192 @@
+from datetime import timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+import enum
+import json
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+try:
+    import pyarrow as pa
+except ImportError:  # pragma: no cover
+    pa = None
+
+JSON = "application/json"
+NDJSON = "application/x-ndjson"
+MSGPACK = "application/msgpack"
+ARROW = "application/vnd.apache.arrow.stream"
+
+# Column order of the rows returned by crud.get_task_rows
+TASK_FIELDS = ("id", "title", "description", "status", "due_date", "created_at", "updated_at")
+DATETIME_FIELDS = ("due_date", "created_at", "updated_at")
+
+def available_media_types(text_type: str = JSON) -> List[str]:
+    """Media types this server can produce, the text default first"""
+    media_types = [text_type]
+    if msgpack is not None:
+        media_types.append(MSGPACK)
+    if pa is not None:
+        media_types.append(ARROW)
+    return media_types
+
+def negotiate(accept: Optional[str], available: Sequence[str]) -> Optional[str]:
+    """
+    Pick the best media type for an Accept header, honouring q-values.
+    Each type takes the q of the most specific range matching it. Falls back to
+    the first available type (JSON) when the header is absent or names nothing
+    we can produce, so existing clients keep getting JSON. Returns None when
+    the client refuses that fallback too (e.g. ``application/json;q=0`` or
+    ``*/*;q=0``), which callers answer with 406 Not Acceptable.
+    """
+    if not accept:
+        return available[0]
+    ranks: Dict[str, Tuple[float, int]] = {}
+    for part in accept.split(","):
+        # Media types and parameter names are case-insensitive
+        media_range, *params = [item.strip().lower() for item in part.split(";")]
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        for media_type in available:
+            if media_range == media_type:
+                specificity = 3
+            elif media_range == media_type.split("/")[0] + "/*":
+                specificity = 2
+            elif media_range == "*/*":
+                specificity = 1
+            else:
+                continue
+            if specificity > ranks.get(media_type, (0.0, 0))[1]:
+                ranks[media_type] = (q, specificity)
+
+    # Higher q wins; on a tie an exact type beats a wildcard, then server order
+    acceptable = [media_type for media_type in available if ranks.get(media_type, (0.0, 0))[0] > 0]
+    if acceptable:
+        return max(acceptable, key=ranks.__getitem__)
+    return None if available[0] in ranks else available[0]
+
+def _utc(value):
+    # Stored datetimes are naive; encode them as if UTC, matching the naive JSON strings
+    return value.replace(tzinfo=timezone.utc) if value is not None and value.tzinfo is None else value
+
+def row_to_dict(row: Sequence[Any]) -> Dict[str, Any]:
+    return dict(zip(TASK_FIELDS, row))
+
+def rows_to_ndjson(rows: Iterable[Sequence[Any]]) -> bytes:
+    """Encode task rows as newline-delimited JSON"""
+    lines = []
+    for row in rows:
+        data = row_to_dict(row)
+        data["status"] = data["status"].value
+        for field in DATETIME_FIELDS:
+            data[field] = data[field].isoformat()
+        lines.append(json.dumps(data))
+    return ("\n".join(lines) + "\n").encode() if lines else b""
+
+def _msgpack_default(value):
+    # Enum members (TaskStatus) are packed as their value
+    if isinstance(value, enum.Enum):
+        return value.value
+    raise TypeError(f"Cannot encode {type(value).__name__} as MessagePack")
+
+def _msgpack_packer():
+    return msgpack.Packer(datetime=True, default=_msgpack_default, autoreset=True)
+
+def _msgpack_row(row: Sequence[Any]) -> Dict[str, Any]:
+    data = row_to_dict(row)
+    for field in DATETIME_FIELDS:
+        data[field] = _utc(data[field])
+    return data
+
+def rows_to_msgpack(rows: Iterable[Sequence[Any]]) -> bytes:
+    """Encode task rows as a MessagePack array of maps"""
+    rows = [_msgpack_row(row) for row in rows]
+    return _msgpack_packer().pack(rows)
+
+def rows_to_msgpack_stream(rows: Iterable[Sequence[Any]]) -> bytes:
+    """Encode task rows as concatenated MessagePack maps (read with msgpack.Unpacker)"""
+    packer = _msgpack_packer()
+    return b"".join(packer.pack(_msgpack_row(row)) for row in rows)
+
+def arrow_schema():
+    return pa.schema([
+        ("id", pa.int64()),
+        ("title", pa.string()),
+        ("description", pa.string()),
+        ("status", pa.string()),
+        ("due_date", pa.timestamp("us")),
+        ("created_at", pa.timestamp("us")),
+        ("updated_at", pa.timestamp("us")),
+    ])
+
+def rows_to_arrow_batch(rows: Sequence[Sequence[Any]], schema=None):
+    """Build one Arrow record batch straight from task rows"""
+    schema = schema or arrow_schema()
+    columns = list(zip(*rows)) if rows else [()] * len(TASK_FIELDS)
+    status_index = TASK_FIELDS.index("status")
+    columns[status_index] = [status.value for status in columns[status_index]]
+    return pa.RecordBatch.from_arrays(
+        [pa.array(column, type=field.type) for column, field in zip(columns, schema)],
+        schema=schema,
+    )
+
+class _ChunkSink:
+    """Write-only file object that hands back what was written since the last drain"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self.closed = False
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+def iter_arrow_stream(batches: Iterable[Sequence[Sequence[Any]]]) -> Iterator[bytes]:
+    """Encode batches of task rows as an Arrow IPC stream, one record batch at a time"""
+    schema = arrow_schema()
+    sink = _ChunkSink()
+    with pa.ipc.new_stream(sink, schema) as writer:
+        for rows in batches:
+            writer.write_batch(rows_to_arrow_batch(rows, schema))
+            yield sink.drain()
+    # The end-of-stream marker is written on close
+    yield sink.drain()
+
+def rows_to_arrow(rows: Sequence[Sequence[Any]]) -> bytes:
+    """Encode task rows as an Arrow IPC stream holding a single record batch"""
+    return b"".join(iter_arrow_stream([rows]))
+
+def iter_encoded(batches: Iterable[Sequence[Sequence[Any]]], media_type: str) -> Iterator[bytes]:
+    """Stream batches of task rows in a streaming-friendly encoding of media_type"""
+    if media_type == ARROW:
+        yield from iter_arrow_stream(batches)
+        return
+    encode = rows_to_msgpack_stream if media_type == MSGPACK else rows_to_ndjson
+    for rows in batches:
+        yield encode(rows)
+
+def encode_rows(rows: Sequence[Sequence[Any]], media_type: str) -> bytes:
+    """Encode a page of task rows as a single MessagePack or Arrow body"""
+    if media_type == ARROW:
+        return rows_to_arrow(rows)
+    if media_type == MSGPACK:
+        return rows_to_msgpack(rows)
+    raise ValueError(f"Unsupported media type: {media_type}")
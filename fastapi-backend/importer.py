@@ -0,0 +1,243 @@
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from pydantic import ValidationError
+from itertools import chain, islice
+from datetime import timedelta
+from typing import Any, BinaryIO, Callable, Iterable, Iterator, List, Optional, Tuple
+import argparse
+import csv
+import hashlib
+import io
+import json
+import logging
+import os
+import sys
+import tempfile
+import crud
+from database import Base, SessionLocal, engines
+from models import ImportFormat, ImportJob, ImportRowError, ImportStatus
+from schemas import TaskCreate
+
+DEFAULT_CHUNK_SIZE = 1000
+# A RUNNING job with no committed chunk for this long is presumed dead and may be resumed
+STALE_IMPORT_AFTER = timedelta(minutes=10)
+COPY_BUFFER_SIZE = 1024 * 1024
+
+logger = logging.getLogger(__name__)
+
+Record = Tuple[int, Any]
+
+def detect_format(filename: str) -> Optional[ImportFormat]:
+    """Guess the import format from a file name"""
+    extension = os.path.splitext(filename or "")[1].lower()
+    if extension == ".csv":
+        return ImportFormat.CSV
+    if extension in (".ndjson", ".jsonl"):
+        return ImportFormat.NDJSON
+    return None
+
+def iter_records(stream: BinaryIO, file_format: ImportFormat) -> Iterator[Record]:
+    """Yield (row number, raw record) pairs, reading the stream incrementally"""
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    if file_format == ImportFormat.CSV:
+        for row_number, row in enumerate(csv.DictReader(text), start=1):
+            # Empty cells mean "not provided" so optional fields take their defaults
+            yield row_number, {k: v for k, v in row.items() if k is not None and v != ""}
+    else:
+        for line_number, line in enumerate(text, start=1):
+            if line.strip():
+                yield line_number, line
+
+def validate_record(raw: Any) -> TaskCreate:
+    """Validate one raw CSV row or NDJSON line"""
+    if isinstance(raw, str):
+        raw = json.loads(raw)
+    return TaskCreate.model_validate(raw)
+
+def describe_error(exc: ValueError) -> str:
+    if isinstance(exc, ValidationError):
+        return "; ".join(
+            f"{'.'.join(str(part) for part in error['loc']) or 'row'}: {error['msg']}"
+            for error in exc.errors()
+        )
+    return str(exc)
+
+def fingerprint(stream: BinaryIO, copy_to: Optional[BinaryIO] = None) -> Tuple[int, str]:
+    """Return (size, sha256) of a stream, optionally copying it as it is read"""
+    digest = hashlib.sha256()
+    size = 0
+    for block in iter(lambda: stream.read(COPY_BUFFER_SIZE), b""):
+        digest.update(block)
+        size += len(block)
+        if copy_to is not None:
+            copy_to.write(block)
+    return size, digest.hexdigest()
+
+def spool_upload(stream: BinaryIO) -> Tuple[str, int, str]:
+    """Copy an upload to a temporary file the background import owns; returns (path, size, sha256)"""
+    with tempfile.NamedTemporaryFile(prefix="task-import-", delete=False) as spool:
+        size, sha256 = fingerprint(stream, copy_to=spool)
+    return spool.name, size, sha256
+
+def import_chunk(db: Session, job: ImportJob, records: List[Record], skip_existing: bool = False) -> None:
+    """
+    Validate and write one chunk. Tasks are committed before the job's progress,
+    so a failure in between (or a partial commit across shards) leaves rows that
+    a resume recognises by (job, row number) instead of inserting twice.
+    """
+    tasks = []
+    row_numbers = []
+    errors = []
+    for row_number, raw in records:
+        try:
+            tasks.append(validate_record(raw))
+            row_numbers.append(row_number)
+        except ValueError as exc:
+            errors.append(ImportRowError(job_id=job.id, row_number=row_number, error=describe_error(exc)))
+    imported = len(tasks)
+
+    if skip_existing and row_numbers:
+        existing = crud.get_imported_row_numbers(db, job.id, row_numbers[0], row_numbers[-1])
+        pending = [(task, n) for task, n in zip(tasks, row_numbers) if n not in existing]
+        tasks = [task for task, _ in pending]
+        row_numbers = [n for _, n in pending]
+
+    crud.bulk_insert_tasks(db, tasks, import_job_id=job.id, row_numbers=row_numbers)
+    with crud.task_reads.writing():
+        db.commit()
+    record_chunk_progress(db, job, len(records), imported, errors)
+    db.commit()
+
+def record_chunk_progress(db: Session, job: ImportJob, processed: int, imported: int, errors: List[ImportRowError]) -> None:
+    """Stage a chunk's row errors and counters; they share the job's shard, so commit together"""
+    db.add_all(errors)
+    job.rows_processed += processed
+    job.rows_imported += imported
+    job.rows_failed += len(errors)
+
+def run_import(
+    db: Session,
+    job: ImportJob,
+    stream: BinaryIO,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    on_progress: Optional[Callable[[ImportJob], None]] = None,
+) -> ImportJob:
+    """
+    Import a CSV/NDJSON stream into tasks, chunk by chunk. The job must already
+    be RUNNING (new, or claimed with crud.claim_import_job). Rows covered by
+    committed progress are skipped, so rerunning with the same file resumes.
+    """
+    # Only the first chunk after a restart can overlap rows written before the failure
+    resuming = job.rows_processed > 0
+    records = islice(iter_records(stream, job.format), job.rows_processed, None)
+    try:
+        while True:
+            chunk = list(islice(records, chunk_size))
+            if not chunk:
+                break
+            import_chunk(db, job, chunk, skip_existing=resuming)
+            resuming = False
+            if on_progress:
+                on_progress(job)
+    except (SQLAlchemyError, UnicodeDecodeError, csv.Error) as exc:
+        # Discard the partial chunk; progress stays at the last committed one
+        db.rollback()
+        job.status = ImportStatus.FAILED
+        job.error_message = str(exc)
+        db.commit()
+        return job
+
+    job.status = ImportStatus.COMPLETED
+    db.commit()
+    db.refresh(job)
+    return job
+
+def run_import_in_background(
+    session_factory: Callable[[], Session], job_id: int, path: str, chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> None:
+    """Run a spooled import with its own session, then remove the spool file"""
+    db = session_factory()
+    try:
+        job = crud.get_import_job(db, job_id)
+        try:
+            with open(path, "rb") as stream:
+                run_import(db, job, stream, chunk_size=chunk_size)
+        except Exception as exc:
+            # Never leave the job RUNNING when the worker itself fails
+            logger.exception("Import job %s failed", job_id)
+            db.rollback()
+            job.status = ImportStatus.FAILED
+            job.error_message = str(exc)
+            db.commit()
+    finally:
+        db.close()
+        os.remove(path)
+
+def iter_errors_csv(errors: Iterable[ImportRowError]) -> Iterator[str]:
+    """Render row errors as CSV text, one line at a time"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    rows = ([error.row_number, error.error] for error in errors)
+    for row in chain([["row_number", "error"]], rows):
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Import tasks from a CSV or NDJSON file")
+    parser.add_argument("path", help="CSV or NDJSON file to import")
+    parser.add_argument("--format", choices=[f.value for f in ImportFormat], help="defaults to the file extension")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="rows per transaction")
+    parser.add_argument("--resume", type=int, metavar="JOB_ID", help="resume a failed import job")
+    parser.add_argument("--errors", metavar="PATH", help="write per-row errors to this CSV file")
+    args = parser.parse_args(argv)
+
+    for db_engine in engines:
+        Base.metadata.create_all(bind=db_engine)
+
+    db = SessionLocal()
+    try:
+        with open(args.path, "rb") as stream:
+            file_size, file_sha256 = fingerprint(stream)
+
+        if args.resume is not None:
+            job = crud.get_import_job(db, args.resume)
+            if job is None:
+                parser.error(f"import job {args.resume} not found")
+            if (job.file_size, job.file_sha256) != (file_size, file_sha256):
+                parser.error(f"{args.path} is not the file import job {args.resume} started with")
+            if not crud.claim_import_job(db, job.id, STALE_IMPORT_AFTER):
+                parser.error(f"import job {args.resume} has completed or is still running")
+            db.refresh(job)
+        else:
+            file_format = ImportFormat(args.format) if args.format else detect_format(args.path)
+            if file_format is None:
+                parser.error("cannot detect the file format; pass --format")
+            job = crud.create_import_job(db, os.path.basename(args.path), file_format, file_size, file_sha256)
+
+        def report(job: ImportJob) -> None:
+            print(
+                f"job {job.id} {job.status.value}: {job.rows_processed} rows processed "
+                f"({job.rows_imported} imported, {job.rows_failed} failed)",
+                file=sys.stderr,
+            )
+
+        with open(args.path, "rb") as stream:
+            job = run_import(db, job, stream, chunk_size=args.chunk_size, on_progress=report)
+        if job.status == ImportStatus.COMPLETED:
+            report(job)
+
+        if args.errors:
+            with open(args.errors, "w", newline="") as errors_file:
+                errors_file.writelines(iter_errors_csv(crud.get_import_errors(db, job.id)))
+
+        if job.status == ImportStatus.FAILED:
+            print(f"import failed: {job.error_message}; rerun with --resume {job.id}", file=sys.stderr)
+            return 1
+        return 0
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    sys.exit(main())
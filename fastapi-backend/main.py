@@ -1,14 +1,20 @@
-from fastapi import FastAPI, HTTPException, Depends, status
+from fastapi import BackgroundTasks, FastAPI, HTTPException, Depends, File, Header, Query, Response, UploadFile, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
+import os
 import crud
+import formats
+import importer
 import models
 import schemas
-from database import Base, engine, get_db
+from database import Base, engines, get_db, get_session_factory
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+# Create database tables (on every shard when sharding is enabled)
+for db_engine in engines:
+    Base.metadata.create_all(bind=db_engine)
 
 # Create FastAPI instance
 app = FastAPI(
@@ -26,6 +32,27 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+task_list_adapter = TypeAdapter(List[schemas.TaskResponse])
+
+def json_response(body: bytes) -> Response:
+    return Response(content=body, media_type="application/json")
+
+def negotiate_media_type(accept: Optional[str], available: List[str]) -> str:
+    """Pick the response media type, or 406 if the client refuses all of them"""
+    media_type = formats.negotiate(accept, available)
+    if media_type is None:
+        raise HTTPException(
+            status_code=status.HTTP_406_NOT_ACCEPTABLE,
+            detail=f"Available media types: {', '.join(available)}",
+        )
+    return media_type
+
+# Binary alternatives advertised in the OpenAPI docs for bulk endpoints
+BINARY_RESPONSES = {
+    200: {"content": {formats.MSGPACK: {}, formats.ARROW: {}}},
+    406: {"description": "None of the available media types is acceptable"},
+}
+
 @app.get("/", tags=["Health"])
 def read_root():
     """Health check endpoint"""
@@ -42,23 +69,72 @@ def create_task(task: schemas.TaskCreate, db: Session = Depends(get_db)):
     """
     return crud.create_task(db=db, task=task)
 
-@app.get("/tasks/", response_model=List[schemas.TaskResponse], tags=["Tasks"])
-def read_tasks(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+@app.get("/tasks/", response_model=List[schemas.TaskResponse], responses=BINARY_RESPONSES, tags=["Tasks"])
+def read_tasks(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=0),
+    after_id: Optional[int] = None,
+    accept: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+):
     """
-    Retrieve all tasks with pagination support.
+    Retrieve all tasks ordered by ID, with pagination support.
     - **skip**: Number of records to skip (default: 0)
     - **limit**: Maximum number of records to return (default: 100)
+    - **after_id**: Cursor; only return tasks with a greater ID. Pass the last ID
+      of the previous page to page deeply without the cost of a large skip.
+
+    Send `Accept: application/msgpack` or `Accept: application/vnd.apache.arrow.stream`
+    for a compact binary body; JSON is returned otherwise, unless the Accept
+    header refuses it (`application/json;q=0`), which gets 406.
+    """
+    media_type = negotiate_media_type(accept, formats.available_media_types())
+
+    def load() -> bytes:
+        if media_type != formats.JSON:
+            # Binary formats are encoded straight from DB rows, skipping pydantic
+            return formats.encode_rows(crud.get_task_rows(db, skip=skip, limit=limit, after_id=after_id), media_type)
+        tasks = crud.get_tasks(db, skip=skip, limit=limit, after_id=after_id)
+        return task_list_adapter.dump_json(task_list_adapter.validate_python(tasks, from_attributes=True))
+
+    body = crud.task_reads.do(("read_tasks", skip, limit, after_id, media_type), load)
+    return Response(content=body, media_type=media_type, headers={"Vary": "Accept"})
+
+@app.get("/tasks/export", responses=BINARY_RESPONSES, tags=["Tasks"])
+def export_tasks(
+    batch_size: int = Query(10000, ge=1, le=100000),
+    accept: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+):
     """
-    tasks = crud.get_tasks(db, skip=skip, limit=limit)
-    return tasks
+    Stream every task in ID order for bulk consumers.
+    - **batch_size**: Rows fetched and encoded per batch (default: 10000)
+
+    Returns NDJSON by default, a stream of MessagePack maps for
+    `Accept: application/msgpack`, or one Arrow record batch per DB batch for
+    `Accept: application/vnd.apache.arrow.stream`. An Accept header that
+    refuses every one of these gets 406.
+    """
+    media_type = negotiate_media_type(accept, formats.available_media_types(formats.NDJSON))
+    return StreamingResponse(
+        formats.iter_encoded(crud.iter_task_rows(db, batch_size=batch_size), media_type),
+        media_type=media_type,
+        headers={"Vary": "Accept"},
+    )
 
 @app.get("/tasks/{task_id}", response_model=schemas.TaskResponse, tags=["Tasks"])
 def read_task(task_id: int, db: Session = Depends(get_db)):
     """Retrieve a task by ID"""
-    db_task = crud.get_task(db, task_id=task_id)
-    if db_task is None:
+    def load() -> Optional[bytes]:
+        db_task = crud.get_task(db, task_id=task_id)
+        if db_task is None:
+            return None
+        return schemas.TaskResponse.model_validate(db_task).model_dump_json().encode()
+
+    body = crud.task_reads.do(("read_task", task_id), load)
+    if body is None:
         raise HTTPException(status_code=404, detail="Task not found")
-    return db_task
+    return json_response(body)
 
 @app.put("/tasks/{task_id}", response_model=schemas.TaskResponse, tags=["Tasks"])
 def update_task(task_id: int, task_update: schemas.TaskUpdate, db: Session = Depends(get_db)):
@@ -91,6 +167,88 @@ def delete_task(task_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Task not found")
     return None
 
+@app.post("/tasks/import", response_model=schemas.ImportJobResponse, status_code=status.HTTP_202_ACCEPTED, tags=["Import"])
+def import_tasks(
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(...),
+    file_format: Optional[models.ImportFormat] = Query(None, alias="format"),
+    chunk_size: int = Query(importer.DEFAULT_CHUNK_SIZE, ge=1, le=10000),
+    db: Session = Depends(get_db),
+    session_factory=Depends(get_session_factory),
+):
+    """
+    Start a bulk import of tasks from an uploaded CSV or NDJSON file.
+    - **file**: CSV with a header row, or one JSON task per line
+    - **format**: csv or ndjson (default: detected from the file name)
+    - **chunk_size**: Rows validated and committed per transaction (default: 1000)
+
+    Returns the new job straight away; the file is imported in the background.
+    Poll `/tasks/import/{job_id}` for progress. Invalid rows are recorded rather
+    than aborting the import; download them from `/tasks/import/{job_id}/errors`.
+    """
+    file_format = file_format or importer.detect_format(file.filename)
+    if file_format is None:
+        raise HTTPException(status_code=400, detail="Cannot detect file format; pass ?format=csv or ?format=ndjson")
+    path, file_size, file_sha256 = importer.spool_upload(file.file)
+    try:
+        job = crud.create_import_job(
+            db, filename=file.filename or "upload", file_format=file_format,
+            file_size=file_size, file_sha256=file_sha256,
+        )
+    except Exception:
+        os.remove(path)
+        raise
+    background_tasks.add_task(importer.run_import_in_background, session_factory, job.id, path, chunk_size)
+    return job
+
+@app.get("/tasks/import/{job_id}", response_model=schemas.ImportJobResponse, tags=["Import"])
+def read_import_job(job_id: int, db: Session = Depends(get_db)):
+    """Retrieve the progress of an import job"""
+    job = crud.get_import_job(db, job_id=job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    return job
+
+@app.post("/tasks/import/{job_id}/resume", response_model=schemas.ImportJobResponse, status_code=status.HTTP_202_ACCEPTED, tags=["Import"])
+def resume_import_job(
+    job_id: int,
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(...),
+    chunk_size: int = Query(importer.DEFAULT_CHUNK_SIZE, ge=1, le=10000),
+    db: Session = Depends(get_db),
+    session_factory=Depends(get_session_factory),
+):
+    """
+    Resume a failed import from its last committed chunk by re-uploading the same
+    file. Jobs still running are refused unless they have stalled.
+    """
+    job = crud.get_import_job(db, job_id=job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    if job.status == models.ImportStatus.COMPLETED:
+        raise HTTPException(status_code=409, detail="Import job has already completed")
+    path, file_size, file_sha256 = importer.spool_upload(file.file)
+    if (file_size, file_sha256) != (job.file_size, job.file_sha256):
+        os.remove(path)
+        raise HTTPException(status_code=409, detail="File does not match the one this import started with")
+    if not crud.claim_import_job(db, job_id, importer.STALE_IMPORT_AFTER):
+        os.remove(path)
+        raise HTTPException(status_code=409, detail="Import job is still running or has completed")
+    db.refresh(job)
+    background_tasks.add_task(importer.run_import_in_background, session_factory, job.id, path, chunk_size)
+    return job
+
+@app.get("/tasks/import/{job_id}/errors", tags=["Import"])
+def download_import_errors(job_id: int, db: Session = Depends(get_db)):
+    """Download the per-row errors of an import job as CSV"""
+    if crud.get_import_job(db, job_id=job_id) is None:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    return StreamingResponse(
+        importer.iter_errors_csv(crud.get_import_errors(db, job_id=job_id)),
+        media_type="text/csv",
+        headers={"Content-Disposition": f'attachment; filename="import-{job_id}-errors.csv"'},
+    )
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
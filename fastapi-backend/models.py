@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Enum
+from sqlalchemy import BigInteger, Column, Integer, String, Text, DateTime, Enum, ForeignKey
 from sqlalchemy.sql import func
 from database import Base
 import enum
@@ -10,13 +10,63 @@ class TaskStatus(str, enum.Enum):
     COMPLETED = "completed"
     CANCELLED = "cancelled"
 
+class ImportFormat(str, enum.Enum):
+    CSV = "csv"
+    NDJSON = "ndjson"
+
+class ImportStatus(str, enum.Enum):
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+# 64-bit so globally unique shard IDs fit; SQLite needs INTEGER to autoincrement
+IdType = BigInteger().with_variant(Integer, "sqlite")
+
 class Task(Base):
     __tablename__ = "tasks"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(IdType, primary_key=True, index=True)
     title = Column(String(255), nullable=False)
     description = Column(Text, nullable=True)
     status = Column(Enum(TaskStatus), default=TaskStatus.TODO, nullable=False)
     due_date = Column(DateTime, nullable=False)
     created_at = Column(DateTime, server_default=func.now(), nullable=False)
-    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), nullable=False)
\ No newline at end of file
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), nullable=False)
+
+class ImportJob(Base):
+    __tablename__ = "import_jobs"
+
+    id = Column(IdType, primary_key=True, index=True)
+    filename = Column(String(255), nullable=False)
+    format = Column(Enum(ImportFormat), nullable=False)
+    # Identify the upload so a resume can refuse a different file
+    file_size = Column(BigInteger, nullable=False)
+    file_sha256 = Column(String(64), nullable=False)
+    status = Column(Enum(ImportStatus), default=ImportStatus.RUNNING, nullable=False)
+    # Source rows consumed by committed chunks; a resumed import skips these
+    rows_processed = Column(Integer, default=0, nullable=False)
+    rows_imported = Column(Integer, default=0, nullable=False)
+    rows_failed = Column(Integer, default=0, nullable=False)
+    error_message = Column(Text, nullable=True)
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), nullable=False)
+
+class ImportRowError(Base):
+    __tablename__ = "import_row_errors"
+    # Keep a job's row errors on the same shard as the job itself
+    __shard_key__ = "job_id"
+
+    id = Column(IdType, primary_key=True, index=True)
+    job_id = Column(IdType, ForeignKey("import_jobs.id"), nullable=False, index=True)
+    row_number = Column(Integer, nullable=False)
+    error = Column(Text, nullable=False)
+
+class ImportJobRow(Base):
+    """A source row an import job has written as a task"""
+    __tablename__ = "import_job_rows"
+
+    # Inserted in the same transaction, and on the same shard, as the task it
+    # records, so a resumed import can skip rows already written. Kept out of
+    # the tasks table so existing deployments need no migration.
+    job_id = Column(IdType, primary_key=True)
+    row_number = Column(Integer, primary_key=True)
@@ -1,7 +1,7 @@
 from pydantic import BaseModel, ConfigDict, Field
 from datetime import datetime
 from typing import Optional
-from models import TaskStatus
+from models import ImportFormat, ImportStatus, TaskStatus
 
 class TaskBase(BaseModel):
     title: str = Field(..., min_length=1, max_length=255)
@@ -23,4 +23,20 @@ class TaskResponse(TaskBase):
     created_at: datetime
     updated_at: datetime
     
+    model_config = ConfigDict(from_attributes=True)
+
+class ImportJobResponse(BaseModel):
+    id: int
+    filename: str
+    format: ImportFormat
+    file_size: int
+    file_sha256: str
+    status: ImportStatus
+    rows_processed: int
+    rows_imported: int
+    rows_failed: int
+    error_message: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+
     model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
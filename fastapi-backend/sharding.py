@@ -0,0 +1,170 @@
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.horizontal_shard import ShardedSession
+from sqlalchemy.orm import Session, sessionmaker
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, TypeVar
+import heapq
+import threading
+import time
+import zlib
+
+T = TypeVar("T")
+
+# Generated IDs are 53 bits wide so they stay exact as JavaScript numbers:
+# 41-bit millisecond timestamp | 5-bit worker ID | 7-bit sequence
+ID_EPOCH_MS = 1704067200000  # 2024-01-01T00:00:00Z
+WORKER_ID_BITS = 5
+SEQUENCE_BITS = 7
+MAX_WORKER_ID = (1 << WORKER_ID_BITS) - 1
+SEQUENCE_MASK = (1 << SEQUENCE_BITS) - 1
+
+# Scatter-gather calls that may run at once when no pool size is given
+DEFAULT_CONCURRENT_FAN_OUTS = 16
+
+class IdGenerator:
+    """Generate time-ordered, globally unique IDs (Snowflake style)"""
+
+    def __init__(self, worker_id: int = 0):
+        if not 0 <= worker_id <= MAX_WORKER_ID:
+            raise ValueError(f"worker_id must be between 0 and {MAX_WORKER_ID}")
+        self.worker_id = worker_id
+        self._lock = threading.Lock()
+        self._last_ms = -1
+        self._sequence = 0
+
+    @staticmethod
+    def _now_ms() -> int:
+        return int(time.time() * 1000) - ID_EPOCH_MS
+
+    def next_id(self) -> int:
+        """Return the next ID, waiting for the clock if the sequence is exhausted"""
+        with self._lock:
+            # Never go backwards, even if the wall clock does
+            now = max(self._now_ms(), self._last_ms)
+            if now == self._last_ms:
+                self._sequence = (self._sequence + 1) & SEQUENCE_MASK
+                if self._sequence == 0:
+                    while now <= self._last_ms:
+                        now = self._now_ms()
+            else:
+                self._sequence = 0
+            self._last_ms = now
+            return (
+                (now << (WORKER_ID_BITS + SEQUENCE_BITS))
+                | (self.worker_id << SEQUENCE_BITS)
+                | self._sequence
+            )
+
+def shard_for_key(key: Any, shard_ids: Sequence[str]) -> str:
+    """Map a shard key (task ID, case reference, ...) to a shard with a stable hash"""
+    return shard_ids[zlib.crc32(str(key).encode("utf-8")) % len(shard_ids)]
+
+def create_shard_engines(urls: Iterable[str]) -> Dict[str, Engine]:
+    """Create one engine per database URL, keyed shard_0 .. shard_N-1"""
+    engines = {}
+    for url in (u.strip() for u in urls):
+        if not url:
+            continue
+        connect_args = {"check_same_thread": False} if url.startswith("sqlite") else {}
+        engines[f"shard_{len(engines)}"] = create_engine(url, connect_args=connect_args)
+    if not engines:
+        raise ValueError("At least one shard database URL is required")
+    return engines
+
+class ShardRouter:
+    """Route rows to shards by hashed ID and fan reads out across all shards"""
+
+    def __init__(
+        self,
+        shards: Dict[str, Engine],
+        id_generator: Optional[IdGenerator] = None,
+        max_workers: Optional[int] = None,
+    ):
+        self.shards = dict(shards)
+        self.shard_ids = list(self.shards)
+        self.id_generator = id_generator or IdGenerator()
+        # Shared by every request, so size it for concurrent requests x shards
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or len(self.shard_ids) * DEFAULT_CONCURRENT_FAN_OUTS,
+            thread_name_prefix="shard",
+        )
+
+    def shard_for(self, key: Any) -> str:
+        return shard_for_key(key, self.shard_ids)
+
+    def group_by_shard(self, rows: Iterable[T], key: Callable[[T], Any]) -> Dict[str, List[T]]:
+        """Bucket rows by the shard their key routes to"""
+        groups: Dict[str, List[T]] = {}
+        for row in rows:
+            groups.setdefault(self.shard_for(key(row)), []).append(row)
+        return groups
+
+    def _shard_chooser(self, mapper, instance, clause=None, **kw):
+        # Models may route by another column (e.g. a parent ID) via __shard_key__
+        shard_key = getattr(instance, "__shard_key__", "id")
+        if instance is not None and getattr(instance, shard_key, None) is not None:
+            return self.shard_for(getattr(instance, shard_key))
+        # No row to route by; any shard will do for e.g. Session.connection()
+        return self.shard_ids[0]
+
+    def _identity_chooser(self, mapper, primary_key, **kw):
+        if getattr(mapper.class_, "__shard_key__", "id") != "id":
+            return self.shard_ids
+        return [self.shard_for(primary_key[0])]
+
+    def _execute_chooser(self, orm_context):
+        return self.shard_ids
+
+    def sessionmaker(self) -> sessionmaker:
+        """Build a ShardedSession factory that assigns IDs before rows are routed"""
+        factory = sessionmaker(
+            class_=ShardedSession,
+            autocommit=False,
+            autoflush=False,
+            shards=self.shards,
+            shard_chooser=self._shard_chooser,
+            identity_chooser=self._identity_chooser,
+            execute_chooser=self._execute_chooser,
+            info={"shard_router": self},
+        )
+
+        @event.listens_for(factory, "before_flush")
+        def assign_ids(session, flush_context, instances):
+            for instance in session.new:
+                if getattr(instance, "id", None) is None:
+                    instance.id = self.id_generator.next_id()
+
+        return factory
+
+    def _run_on_shard(self, shard_id: str, fn: Callable[[Session], T]) -> T:
+        with Session(bind=self.shards[shard_id], expire_on_commit=False) as session:
+            return fn(session)
+
+    def scatter_gather(self, fn: Callable[[Session], T]) -> List[T]:
+        """Run fn against every shard in parallel, each with its own session"""
+        # The calling thread queries the first shard itself rather than idling
+        futures = [
+            self._executor.submit(self._run_on_shard, shard_id, fn)
+            for shard_id in self.shard_ids[1:]
+        ]
+        first = self._run_on_shard(self.shard_ids[0], fn)
+        return [first] + [future.result() for future in futures]
+
+    def merge_sorted(
+        self,
+        fn: Callable[[Session], List[T]],
+        key: Callable[[T], Any],
+        skip: int = 0,
+        limit: Optional[int] = None,
+    ) -> List[T]:
+        """Merge per-shard results (each already sorted by key) into one page"""
+        merged = heapq.merge(*self.scatter_gather(fn), key=key)
+        stop = None if limit is None else skip + limit
+        return list(islice(merged, skip, stop))
+
+    def dispose(self) -> None:
+        self._executor.shutdown(wait=True)
+        for engine in self.shards.values():
+            engine.dispose()
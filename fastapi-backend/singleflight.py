@@ -0,0 +1,145 @@
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterator, Optional, Tuple, TypeVar
+import asyncio
+import copy
+import threading
+
+T = TypeVar("T")
+
+class SharedCallError(RuntimeError):
+    """Raised to a waiter when the shared call's exception cannot be copied"""
+
+def _fresh_error(error: BaseException) -> BaseException:
+    """
+    Copy a shared call's exception for one waiter. Raising the same object in
+    several threads would have them all rewrite its traceback and context.
+    """
+    try:
+        return copy.copy(error)
+    except Exception:
+        return SharedCallError(f"shared call failed: {error!r}")
+
+class _Call:
+    """An in-flight synchronous call shared by every caller with the same key"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+class _AsyncCall:
+    """An in-flight coroutine shared by every awaiting caller with the same key"""
+
+    def __init__(self, task: "asyncio.Future[Any]"):
+        self.task = task
+        self.waiters = 0
+
+class SingleFlight:
+    """
+    Coalesce identical concurrent calls so only one of them does the work.
+    The first caller for a key runs the function; callers arriving while it is
+    in flight wait for and share its result; if it fails, each waiter raises its
+    own copy of the exception, chained to the original. Nothing is cached
+    once the call finishes, so results are never staler than the request.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self._async_calls: Dict[Tuple[asyncio.AbstractEventLoop, Hashable], _AsyncCall] = {}
+        # Writes currently committing; calls made meanwhile are not shared
+        self._writes = 0
+
+    def do(self, key: Hashable, fn: Callable[[], T]) -> T:
+        """Run fn, or wait for the identical call already in flight"""
+        with self._lock:
+            if self._writes:
+                # A write may be landing; a shared call could be from before it
+                call = None
+            else:
+                call = self._calls.get(key)
+                leader = call is None
+                if leader:
+                    call = self._calls[key] = _Call()
+
+        if call is None:
+            return fn()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise _fresh_error(call.error) from call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            self._discard(self._calls, key, call)
+            call.done.set()
+        return call.result
+
+    async def do_async(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """Await fn(), or join the identical coroutine already in flight"""
+        flight_key = (asyncio.get_running_loop(), key)
+        with self._lock:
+            if self._writes:
+                call = None
+            else:
+                call = self._async_calls.get(flight_key)
+                if call is None:
+                    call = self._async_calls[flight_key] = _AsyncCall(asyncio.ensure_future(fn()))
+                    call.task.add_done_callback(
+                        lambda _: self._discard(self._async_calls, flight_key, call)
+                    )
+
+        if call is None:
+            return await fn()
+
+        call.waiters += 1
+        try:
+            # Shield so one waiter being cancelled does not cancel the others
+            return await asyncio.shield(call.task)
+        except Exception as exc:
+            raise _fresh_error(exc) from exc
+        except asyncio.CancelledError:
+            if call.waiters == 1 and not call.task.done():
+                # Last one out: nobody is left to use the result
+                call.task.cancel()
+                self._discard(self._async_calls, flight_key, call)
+            raise
+        finally:
+            call.waiters -= 1
+
+    @contextmanager
+    def writing(self) -> Iterator[None]:
+        """
+        Wrap a write's commit. Calls made while it runs are not shared, and on
+        exit calls already in flight are forgotten, so no call that starts after
+        the commit can be served a result from before it.
+        """
+        with self._lock:
+            self._writes += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._writes -= 1
+                self._calls.clear()
+                self._async_calls.clear()
+
+    def forget(self) -> None:
+        """
+        Stop new callers from joining calls already in flight. Writers should
+        prefer writing(), which also covers calls made during the commit.
+        """
+        with self._lock:
+            self._calls.clear()
+            self._async_calls.clear()
+
+    def _discard(self, calls: Dict[Any, Any], key: Any, call: Any) -> None:
+        with self._lock:
+            if calls.get(key) is call:
+                del calls[key]
@@ -9,7 +9,7 @@ import os
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from database import Base, get_db
+from database import Base, get_db, get_session_factory
 from main import app
 
 # Create in-memory SQLite database for testing
@@ -45,6 +45,7 @@ def client(test_db):
     """Create a test client with overridden dependencies"""
     # Override the dependency
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_session_factory] = lambda: TestingSessionLocal
     
     # Create test client directly
     test_client = TestClient(app)
@@ -53,6 +54,13 @@ def client(test_db):
     # Clean up
     app.dependency_overrides.clear()
 
+@pytest.fixture
+def db_session(test_db):
+    """Database session on the test database, for setting up state directly"""
+    db = TestingSessionLocal()
+    yield db
+    db.close()
+
 @pytest.fixture
 def sample_task_data():
     """Fixture providing sample task data"""
@@ -67,4 +75,21 @@ def sample_task_data():
 def created_task(client, sample_task_data):
     """Fixture that creates a task and returns its data"""
     response = client.post("/tasks/", json=sample_task_data)
-    return response.json()
\ No newline at end of file
+    return response.json()
+
+@pytest.fixture
+def create_tasks():
+    """Fixture returning a helper that creates count tasks through the API"""
+    def create(client, count):
+        tasks = []
+        for i in range(count):
+            response = client.post("/tasks/", json={
+                "title": f"Task {i}",
+                "description": None if i % 2 else f"Description {i}",
+                "status": "todo",
+                "due_date": f"2025-12-{i % 28 + 1:02d}T10:00:00"
+            })
+            assert response.status_code == 201
+            tasks.append(response.json())
+        return tasks
+    return create
@@ -0,0 +1,136 @@
+import io
+import json
+from datetime import datetime
+
+import pytest
+from fastapi import status
+
+import formats
+from models import TaskStatus
+
+msgpack = pytest.importorskip("msgpack")
+pa = pytest.importorskip("pyarrow")
+
+def normalize(record):
+    """Bring a decoded binary record into the shape of the JSON response"""
+    record = dict(record)
+    for field in formats.DATETIME_FIELDS:
+        value = record[field]
+        if isinstance(value, datetime):
+            record[field] = value.replace(tzinfo=None).isoformat()
+    return record
+
+class TestNegotiation:
+    """Test Accept header negotiation"""
+
+    @pytest.mark.parametrize("accept, expected", [
+        (None, formats.JSON),
+        ("*/*", formats.JSON),
+        ("application/msgpack", formats.MSGPACK),
+        ("*/*, application/msgpack", formats.MSGPACK),
+        ("application/json;q=0.5, application/vnd.apache.arrow.stream", formats.ARROW),
+        ("application/msgpack;q=0.2, application/json", formats.JSON),
+        ("text/html", formats.JSON),
+        ("application/json;q=0.5, application/*;q=0.8", formats.MSGPACK),
+        ("*/*;q=0.1, application/json;q=0", formats.MSGPACK),
+        ("application/json;q=0", None),
+        ("*/*;q=0", None),
+        ("text/html, application/json;q=0", None),
+        ("APPLICATION/MSGPACK", formats.MSGPACK),
+        ("Application/Vnd.Apache.Arrow.Stream", formats.ARROW),
+        ("application/msgpack;Q=0.2, application/json", formats.JSON),
+    ])
+    def test_negotiate(self, accept, expected):
+        """Test the best available media type is chosen"""
+        assert formats.negotiate(accept, formats.available_media_types()) == expected
+
+class TestMsgpackEncoding:
+    """Test MessagePack encoding of non-native values"""
+
+    def test_enum_packed_as_value(self):
+        """Test enum members are packed as their value"""
+        assert formats._msgpack_default(TaskStatus.TODO) == "todo"
+
+    def test_unsupported_type_rejected(self):
+        """Test values msgpack cannot represent raise TypeError instead of AttributeError"""
+        with pytest.raises(TypeError):
+            formats._msgpack_default(object())
+
+class TestBinaryList:
+    """Test binary encodings of the task list"""
+
+    def test_json_is_default(self, client, created_task):
+        """Test clients without an Accept header still get JSON"""
+        response = client.get("/tasks/")
+        assert response.headers["content-type"] == formats.JSON
+        assert response.headers["vary"] == "Accept"
+        assert response.json() == [created_task]
+
+    def test_msgpack(self, client, create_tasks):
+        """Test MessagePack lists decode to the same records as JSON"""
+        expected = create_tasks(client, 5)
+        response = client.get("/tasks/", headers={"Accept": formats.MSGPACK})
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-type"] == formats.MSGPACK
+
+        records = msgpack.unpackb(response.content, timestamp=3)
+        assert [normalize(record) for record in records] == expected
+
+    def test_arrow(self, client, create_tasks):
+        """Test Arrow IPC lists decode to the same records as JSON"""
+        expected = create_tasks(client, 5)
+        response = client.get("/tasks/", headers={"Accept": formats.ARROW})
+        assert response.headers["content-type"] == formats.ARROW
+
+        table = pa.ipc.open_stream(response.content).read_all()
+        assert table.schema.names == list(formats.TASK_FIELDS)
+        assert [normalize(record) for record in table.to_pylist()] == expected
+
+    def test_pagination(self, client, create_tasks):
+        """Test skip/limit apply to binary formats"""
+        expected = create_tasks(client, 6)
+        response = client.get("/tasks/?skip=2&limit=3", headers={"Accept": formats.MSGPACK})
+        records = msgpack.unpackb(response.content, timestamp=3)
+        assert [record["id"] for record in records] == [task["id"] for task in expected[2:5]]
+
+    def test_json_refused(self, client):
+        """Test an Accept header that refuses every available type gets 406"""
+        response = client.get("/tasks/", headers={"Accept": "application/json;q=0"})
+        assert response.status_code == status.HTTP_406_NOT_ACCEPTABLE
+
+    def test_empty_arrow(self, client):
+        """Test an empty page is a valid Arrow stream"""
+        response = client.get("/tasks/", headers={"Accept": formats.ARROW})
+        assert pa.ipc.open_stream(response.content).read_all().num_rows == 0
+
+class TestExport:
+    """Test streaming export of every task"""
+
+    def test_ndjson_is_default(self, client, create_tasks):
+        """Test the export streams one JSON object per line"""
+        expected = create_tasks(client, 7)
+        response = client.get("/tasks/export?batch_size=3")
+        assert response.headers["content-type"] == formats.NDJSON
+        assert [json.loads(line) for line in response.text.splitlines()] == expected
+
+    def test_msgpack_stream(self, client, create_tasks):
+        """Test the MessagePack export is a stream of maps"""
+        expected = create_tasks(client, 7)
+        response = client.get("/tasks/export?batch_size=3", headers={"Accept": formats.MSGPACK})
+        records = list(msgpack.Unpacker(io.BytesIO(response.content), timestamp=3))
+        assert [normalize(record) for record in records] == expected
+
+    def test_arrow_stream(self, client, create_tasks):
+        """Test the Arrow export holds one record batch per DB batch"""
+        expected = create_tasks(client, 7)
+        response = client.get("/tasks/export?batch_size=3", headers={"Accept": formats.ARROW})
+        reader = pa.ipc.open_stream(response.content)
+        batches = list(reader)
+        assert [batch.num_rows for batch in batches] == [3, 3, 1]
+        table = pa.Table.from_batches(batches)
+        assert [normalize(record) for record in table.to_pylist()] == expected
+
+    def test_ndjson_refused(self, client):
+        """Test an export refusing every available type gets 406"""
+        response = client.get("/tasks/export", headers={"Accept": "*/*;q=0"})
+        assert response.status_code == status.HTTP_406_NOT_ACCEPTABLE
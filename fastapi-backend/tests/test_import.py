@@ -0,0 +1,239 @@
+import csv
+import hashlib
+import io
+import json
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import status
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+import crud
+from database import Base, get_db, get_session_factory
+from main import app
+from models import ImportFormat
+
+CSV_DUMP = (
+    "title,description,status,due_date\n"
+    "Review bundle,,todo,2025-12-31T10:00:00\n"
+    "Draft order,\"Multi-line\ndescription\",in_progress,2025-11-30T09:00:00\n"
+    ",Missing title,todo,2025-12-31T10:00:00\n"
+    "Chase respondent,,unknown,2025-12-31T10:00:00\n"
+    "File bundle,,completed,2025-10-01T12:00:00\n"
+)
+
+def ndjson_dump(count):
+    return "".join(
+        json.dumps({"title": f"Task {i}", "status": "todo", "due_date": "2025-12-31T10:00:00"}) + "\n"
+        for i in range(count)
+    )
+
+def upload(client, content, filename="tasks.csv", path="/tasks/import", **params):
+    return client.post(path, params=params, files={"file": (filename, content.encode("utf-8"))})
+
+def wait_for_import(client, job_id, timeout=10):
+    """Poll an import job until it stops running"""
+    deadline = time.monotonic() + timeout
+    while True:
+        job = client.get(f"/tasks/import/{job_id}").json()
+        if job["status"] != "running" or time.monotonic() > deadline:
+            return job
+        time.sleep(0.05)
+
+def run_import(client, content, filename="tasks.csv", path="/tasks/import", **params):
+    """Start an import and return the job once it has finished"""
+    response = upload(client, content, filename=filename, path=path, **params)
+    assert response.status_code == status.HTTP_202_ACCEPTED
+    return wait_for_import(client, response.json()["id"])
+
+class TestTaskImport:
+    """Test bulk task import from CSV/NDJSON uploads"""
+
+    def test_import_is_accepted_then_polled(self, client):
+        """Test the job is returned before the import runs and progress can be polled"""
+        response = upload(client, CSV_DUMP, chunk_size=2)
+        assert response.status_code == status.HTTP_202_ACCEPTED
+
+        accepted = response.json()
+        assert accepted["status"] == "running"
+        assert accepted["rows_processed"] == 0
+        assert accepted["file_size"] == len(CSV_DUMP.encode("utf-8"))
+        assert accepted["file_sha256"] == hashlib.sha256(CSV_DUMP.encode("utf-8")).hexdigest()
+
+        job = wait_for_import(client, accepted["id"])
+        assert job["status"] == "completed"
+        assert job["format"] == "csv"
+        assert job["rows_processed"] == 5
+        assert job["rows_imported"] == 3
+        assert job["rows_failed"] == 2
+
+    def test_import_csv(self, client):
+        """Test valid rows are imported and invalid rows are reported"""
+        run_import(client, CSV_DUMP, chunk_size=2)
+
+        tasks = client.get("/tasks/").json()
+        assert [task["title"] for task in tasks] == ["Review bundle", "Draft order", "File bundle"]
+        assert tasks[0]["description"] is None
+        assert tasks[1]["description"] == "Multi-line\ndescription"
+
+    def test_download_errors(self, client):
+        """Test per-row errors can be downloaded as CSV"""
+        job = run_import(client, CSV_DUMP)
+
+        response = client.get(f"/tasks/import/{job['id']}/errors")
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-type"].startswith("text/csv")
+        assert "attachment" in response.headers["content-disposition"]
+
+        rows = list(csv.reader(io.StringIO(response.text)))
+        assert rows[0] == ["row_number", "error"]
+        assert [row[0] for row in rows[1:]] == ["3", "4"]
+        assert rows[1][1].startswith("title:")
+        assert rows[2][1].startswith("status:")
+
+    def test_import_ndjson(self, client):
+        """Test NDJSON imports report malformed lines by line number"""
+        content = ndjson_dump(3) + "\n{not json}\n"
+        job = run_import(client, content, filename="tasks.ndjson")
+        assert job["format"] == "ndjson"
+        assert job["rows_imported"] == 3
+        assert job["rows_failed"] == 1
+
+        rows = list(csv.reader(io.StringIO(client.get(f"/tasks/import/{job['id']}/errors").text)))
+        assert rows[1][0] == "5"
+
+    def test_import_explicit_format(self, client):
+        """Test the format can be given when the file name has no extension"""
+        job = run_import(client, ndjson_dump(2), filename="dump", format="ndjson")
+        assert job["rows_imported"] == 2
+
+    def test_import_unknown_format(self, client):
+        """Test uploads with an undetectable format are rejected"""
+        response = upload(client, ndjson_dump(2), filename="dump.txt")
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_get_import_job_not_found(self, client):
+        """Test missing import jobs return 404"""
+        assert client.get("/tasks/import/999").status_code == status.HTTP_404_NOT_FOUND
+        assert client.get("/tasks/import/999/errors").status_code == status.HTTP_404_NOT_FOUND
+
+class TestImportResume:
+    """Test failed imports resume from the last committed chunk"""
+
+    def test_resume_after_failure(self, client, monkeypatch):
+        """Test a failed chunk is rolled back and the import resumes without duplicates"""
+        bulk_insert_tasks = crud.bulk_insert_tasks
+        calls = []
+
+        def failing_bulk_insert(db, tasks, **kwargs):
+            calls.append(len(tasks))
+            if len(calls) == 3:
+                raise OperationalError("INSERT", {}, Exception("connection lost"))
+            return bulk_insert_tasks(db, tasks, **kwargs)
+
+        monkeypatch.setattr(crud, "bulk_insert_tasks", failing_bulk_insert)
+        content = ndjson_dump(10)
+        job = run_import(client, content, filename="tasks.ndjson", chunk_size=3)
+        assert job["status"] == "failed"
+        assert "connection lost" in job["error_message"]
+        assert job["rows_processed"] == 6
+        assert len(client.get("/tasks/").json()) == 6
+
+        monkeypatch.setattr(crud, "bulk_insert_tasks", bulk_insert_tasks)
+        resumed = run_import(client, content, filename="tasks.ndjson",
+                             path=f"/tasks/import/{job['id']}/resume", chunk_size=3)
+        assert resumed["status"] == "completed"
+        assert resumed["rows_processed"] == 10
+        assert resumed["error_message"] is None
+
+        titles = [task["title"] for task in client.get("/tasks/").json()]
+        assert titles == [f"Task {i}" for i in range(10)]
+
+    def test_resume_completed_job(self, client):
+        """Test completed imports cannot be resumed"""
+        job = run_import(client, ndjson_dump(1), filename="tasks.ndjson")
+        response = upload(client, ndjson_dump(1), filename="tasks.ndjson",
+                          path=f"/tasks/import/{job['id']}/resume")
+        assert response.status_code == status.HTTP_409_CONFLICT
+
+    def test_resume_with_different_file(self, client, db_session):
+        """Test a resume is refused when the re-uploaded file differs"""
+        content = ndjson_dump(3).encode("utf-8")
+        job = crud.create_import_job(db_session, "tasks.ndjson", ImportFormat.NDJSON,
+                                     len(content), hashlib.sha256(content).hexdigest())
+        job.status = "failed"
+        db_session.commit()
+
+        response = upload(client, ndjson_dump(4), filename="tasks.ndjson",
+                          path=f"/tasks/import/{job.id}/resume")
+        assert response.status_code == status.HTTP_409_CONFLICT
+        assert "does not match" in response.json()["detail"]
+
+    def test_resume_running_job(self, client, db_session):
+        """Test a running job is refused until it has stalled"""
+        content = ndjson_dump(3).encode("utf-8")
+        job = crud.create_import_job(db_session, "tasks.ndjson", ImportFormat.NDJSON,
+                                     len(content), hashlib.sha256(content).hexdigest())
+        path = f"/tasks/import/{job.id}/resume"
+
+        response = upload(client, ndjson_dump(3), filename="tasks.ndjson", path=path)
+        assert response.status_code == status.HTTP_409_CONFLICT
+
+        # No progress for longer than the stale timeout: the worker is presumed dead
+        job.updated_at = datetime.utcnow() - timedelta(hours=1)
+        db_session.commit()
+        resumed = run_import(client, ndjson_dump(3), filename="tasks.ndjson", path=path)
+        assert resumed["status"] == "completed"
+        assert resumed["rows_imported"] == 3
+
+# The tasks table as deployed before bulk import existed; create_all never alters it
+BASELINE_TASKS_DDL = """
+CREATE TABLE tasks (
+    id INTEGER NOT NULL PRIMARY KEY,
+    title VARCHAR(255) NOT NULL,
+    description TEXT,
+    status VARCHAR(11) NOT NULL,
+    due_date DATETIME NOT NULL,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL,
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL
+)
+"""
+
+class TestExistingDatabase:
+    """Test a database created before bulk import keeps working without a migration"""
+
+    @pytest.fixture
+    def baseline_client(self, tmp_path):
+        engine = create_engine(f"sqlite:///{tmp_path / 'baseline.db'}")
+        with engine.begin() as conn:
+            conn.execute(text(BASELINE_TASKS_DDL))
+        Base.metadata.create_all(bind=engine)
+        SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+        def override_get_db():
+            db = SessionLocal()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        app.dependency_overrides[get_db] = override_get_db
+        app.dependency_overrides[get_session_factory] = lambda: SessionLocal
+        yield TestClient(app)
+        app.dependency_overrides.clear()
+        engine.dispose()
+
+    def test_tasks_and_imports_on_baseline_schema(self, baseline_client):
+        """Test tasks can be read and imported into a tasks table with the original columns"""
+        task = baseline_client.post("/tasks/", json={
+            "title": "Existing", "status": "todo", "due_date": "2025-12-31T10:00:00"
+        }).json()
+        assert baseline_client.get(f"/tasks/{task['id']}").status_code == status.HTTP_200_OK
+
+        job = run_import(baseline_client, ndjson_dump(3), filename="tasks.ndjson")
+        assert job["status"] == "completed"
+        assert len(baseline_client.get("/tasks/").json()) == 4
@@ -0,0 +1,238 @@
+import json
+import os
+import subprocess
+import sys
+import threading
+import pytest
+from fastapi import status
+from fastapi.testclient import TestClient
+
+from database import Base, get_db, get_session_factory
+from main import app
+from models import Task
+from sharding import IdGenerator, ShardRouter, create_shard_engines, shard_for_key
+from sqlalchemy.exc import OperationalError
+from tests.test_import import ndjson_dump, run_import
+import importer
+
+SHARD_COUNT = 3
+
+@pytest.fixture(scope="function")
+def shard_router(tmp_path):
+    """Create a router over several SQLite files standing in for shards"""
+    urls = [f"sqlite:///{tmp_path / f'shard_{i}.db'}" for i in range(SHARD_COUNT)]
+    router = ShardRouter(create_shard_engines(urls), IdGenerator(worker_id=1))
+    for engine in router.shards.values():
+        Base.metadata.create_all(bind=engine)
+    yield router
+    router.dispose()
+
+@pytest.fixture(scope="function")
+def sharded_client(shard_router):
+    """Create a test client whose sessions are routed across the shards"""
+    ShardedSessionLocal = shard_router.sessionmaker()
+
+    def override_get_db():
+        db = ShardedSessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_session_factory] = lambda: ShardedSessionLocal
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+class TestIdGenerator:
+    """Test globally unique ID generation"""
+
+    def test_ids_are_unique_and_increasing(self):
+        """Test IDs never repeat, even when the sequence wraps within a millisecond"""
+        generator = IdGenerator()
+        ids = [generator.next_id() for _ in range(1000)]
+        assert ids == sorted(ids)
+        assert len(set(ids)) == len(ids)
+
+    def test_ids_are_javascript_safe(self):
+        """Test IDs fit in 53 bits"""
+        assert IdGenerator(worker_id=31).next_id() < 2 ** 53
+
+    def test_invalid_worker_id(self):
+        """Test worker IDs outside the reserved bits are rejected"""
+        with pytest.raises(ValueError):
+            IdGenerator(worker_id=32)
+
+class TestShardConfig:
+    """Test sharding configuration from the environment"""
+
+    def import_database(self, **env):
+        backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        environ = {k: v for k, v in os.environ.items() if not k.startswith("SHARD_")}
+        return subprocess.run(
+            [sys.executable, "-c", "import database"],
+            cwd=backend_dir, env={**environ, **env}, capture_output=True, text=True,
+        )
+
+    def test_worker_id_required_when_sharding(self, tmp_path):
+        """Test startup fails instead of every process defaulting to worker 0"""
+        urls = ",".join(f"sqlite:///{tmp_path / f'shard_{i}.db'}" for i in range(2))
+        result = self.import_database(SHARD_DATABASE_URLS=urls)
+        assert result.returncode != 0
+        assert "SHARD_WORKER_ID must be set" in result.stderr
+
+        assert self.import_database(SHARD_DATABASE_URLS=urls, SHARD_WORKER_ID="3").returncode == 0
+
+class TestShardRouting:
+    """Test tasks are routed to shards by hashed ID"""
+
+    def test_shard_for_key_is_stable(self):
+        """Test the same key always maps to the same shard"""
+        shard_ids = ["shard_0", "shard_1", "shard_2"]
+        assert shard_for_key(12345, shard_ids) == shard_for_key(12345, shard_ids)
+        assert shard_for_key("CASE-1", shard_ids) in shard_ids
+
+    def test_tasks_stored_on_owning_shard(self, sharded_client, shard_router, create_tasks):
+        """Test each task lives only on the shard its ID hashes to"""
+        ids = [task["id"] for task in create_tasks(sharded_client, 30)]
+
+        per_shard = shard_router.scatter_gather(
+            lambda db: {task.id for task in db.query(Task).all()}
+        )
+        assert sum(len(shard_ids) for shard_ids in per_shard) == len(ids)
+        assert all(per_shard), "expected every shard to receive tasks"
+        for shard_id, shard_ids in zip(shard_router.shard_ids, per_shard):
+            assert all(shard_router.shard_for(task_id) == shard_id for task_id in shard_ids)
+
+    def test_single_task_operations(self, sharded_client, create_tasks):
+        """Test read, update and delete reach the owning shard"""
+        task_id = create_tasks(sharded_client, 5)[2]["id"]
+
+        response = sharded_client.get(f"/tasks/{task_id}")
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["title"] == "Task 2"
+
+        response = sharded_client.put(f"/tasks/{task_id}", json={"title": "Renamed"})
+        assert response.json()["title"] == "Renamed"
+
+        response = sharded_client.patch(f"/tasks/{task_id}/status?status=completed")
+        assert response.json()["status"] == "completed"
+
+        assert sharded_client.delete(f"/tasks/{task_id}").status_code == status.HTTP_204_NO_CONTENT
+        assert sharded_client.get(f"/tasks/{task_id}").status_code == status.HTTP_404_NOT_FOUND
+
+class TestScatterGather:
+    """Test listing merges results from every shard"""
+
+    def test_list_merges_all_shards_in_id_order(self, sharded_client, create_tasks):
+        """Test the list endpoint returns every task sorted by ID"""
+        ids = [task["id"] for task in create_tasks(sharded_client, 20)]
+
+        response = sharded_client.get("/tasks/")
+        assert response.status_code == status.HTTP_200_OK
+        assert [task["id"] for task in response.json()] == sorted(ids)
+
+    def test_pagination_across_shards(self, sharded_client, create_tasks):
+        """Test skip/limit pages are contiguous across shard boundaries"""
+        ids = sorted(task["id"] for task in create_tasks(sharded_client, 20))
+
+        pages = []
+        for skip in range(0, 20, 7):
+            response = sharded_client.get(f"/tasks/?skip={skip}&limit=7")
+            pages.extend(task["id"] for task in response.json())
+        assert pages == ids
+
+    def test_cursor_pagination_across_shards(self, sharded_client, create_tasks):
+        """Test after_id pages walk every shard in ID order"""
+        ids = sorted(task["id"] for task in create_tasks(sharded_client, 20))
+
+        pages, after_id = [], 0
+        while True:
+            page = sharded_client.get(f"/tasks/?after_id={after_id}&limit=6").json()
+            if not page:
+                break
+            pages.extend(task["id"] for task in page)
+            after_id = page[-1]["id"]
+        assert pages == ids
+
+    def test_negative_skip_rejected(self, sharded_client):
+        """Test a negative skip is a validation error, not a server error"""
+        response = sharded_client.get("/tasks/?skip=-1")
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+    def test_concurrent_lists_exceed_shard_count(self, shard_router):
+        """Test more scatter-gathers than shards can run at once"""
+        barrier = threading.Barrier(SHARD_COUNT * 2 + 1)
+
+        def wait_for_all(db):
+            barrier.wait(timeout=5)
+            return 1
+
+        threads = [
+            threading.Thread(target=shard_router.scatter_gather, args=(wait_for_all,))
+            for _ in range(2)
+        ]
+        for thread in threads:
+            thread.start()
+        barrier.wait(timeout=5)
+        for thread in threads:
+            thread.join()
+
+    def test_export_walks_all_shards_in_id_order(self, sharded_client, create_tasks):
+        """Test the keyset-paginated export merges every shard"""
+        ids = [task["id"] for task in create_tasks(sharded_client, 20)]
+
+        response = sharded_client.get("/tasks/export?batch_size=6")
+        assert [json.loads(line)["id"] for line in response.text.splitlines()] == sorted(ids)
+
+class TestShardedImport:
+    """Test bulk imports route rows to their owning shards"""
+
+    def test_import_spreads_tasks_across_shards(self, sharded_client, shard_router):
+        """Test imported tasks and row errors land on the right shards"""
+        content = "title,status,due_date\n" + "".join(
+            f"Task {i},{'todo' if i % 5 else 'bogus'},2025-12-31T10:00:00\n" for i in range(30)
+        )
+        job = run_import(sharded_client, content, chunk_size=7)
+        assert job["status"] == "completed"
+        assert job["rows_imported"] == 24
+        assert job["rows_failed"] == 6
+
+        per_shard = shard_router.scatter_gather(
+            lambda db: {task.id for task in db.query(Task).all()}
+        )
+        assert sum(len(shard_ids) for shard_ids in per_shard) == 24
+        for shard_id, shard_ids in zip(shard_router.shard_ids, per_shard):
+            assert all(shard_router.shard_for(task_id) == shard_id for task_id in shard_ids)
+
+        assert len(sharded_client.get("/tasks/").json()) == 24
+        errors = sharded_client.get(f"/tasks/import/{job['id']}/errors").text.splitlines()
+        assert [line.split(",")[0] for line in errors[1:]] == ["1", "6", "11", "16", "21", "26"]
+
+    def test_resume_after_partial_commit(self, sharded_client, monkeypatch):
+        """Test rows committed on some shards before progress was saved are not re-inserted"""
+        record_chunk_progress = importer.record_chunk_progress
+        calls = []
+
+        def failing_progress(*args, **kwargs):
+            calls.append(1)
+            if len(calls) == 2:
+                # The chunk's tasks are committed on their shards; the job never hears of it
+                raise OperationalError("UPDATE", {}, Exception("connection lost"))
+            return record_chunk_progress(*args, **kwargs)
+
+        monkeypatch.setattr(importer, "record_chunk_progress", failing_progress)
+        content = ndjson_dump(20)
+        job = run_import(sharded_client, content, filename="tasks.ndjson", chunk_size=6)
+        assert job["status"] == "failed"
+        assert job["rows_processed"] == 6
+        assert len(sharded_client.get("/tasks/").json()) == 12
+
+        monkeypatch.setattr(importer, "record_chunk_progress", record_chunk_progress)
+        resumed = run_import(sharded_client, content, filename="tasks.ndjson",
+                             path=f"/tasks/import/{job['id']}/resume", chunk_size=6)
+        assert resumed["status"] == "completed"
+        assert resumed["rows_imported"] == 20
+
+        titles = [task["title"] for task in sharded_client.get("/tasks/").json()]
+        assert sorted(titles) == sorted(f"Task {i}" for i in range(20))
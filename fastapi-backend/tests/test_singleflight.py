@@ -0,0 +1,301 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi import status
+
+import crud
+import importer
+from models import ImportFormat
+from singleflight import SharedCallError, SingleFlight
+
+def run_concurrently(count, fn):
+    """Start count calls to fn at the same moment and return their results"""
+    barrier = threading.Barrier(count)
+
+    def call():
+        barrier.wait()
+        return fn()
+
+    with ThreadPoolExecutor(max_workers=count) as executor:
+        futures = [executor.submit(call) for _ in range(count)]
+        return [future.result() for future in futures]
+
+class TestSingleFlight:
+    """Test coalescing of synchronous calls"""
+
+    def test_concurrent_calls_share_one_execution(self):
+        """Test identical in-flight calls run the function once"""
+        flight = SingleFlight()
+        calls = []
+
+        def slow():
+            calls.append(1)
+            time.sleep(0.2)
+            return "result"
+
+        results = run_concurrently(10, lambda: flight.do("key", slow))
+        assert results == ["result"] * 10
+        assert len(calls) == 1
+
+    def test_different_keys_are_not_shared(self):
+        """Test calls with different keys run independently"""
+        flight = SingleFlight()
+        assert flight.do("a", lambda: 1) == 1
+        assert flight.do("b", lambda: 2) == 2
+
+    def test_completed_calls_are_not_cached(self):
+        """Test a finished call is re-run for the next caller"""
+        flight = SingleFlight()
+        counter = iter(range(10))
+        assert flight.do("key", lambda: next(counter)) == 0
+        assert flight.do("key", lambda: next(counter)) == 1
+
+    def test_errors_reach_every_waiter(self):
+        """Test all waiters see the leader's exception, and the next call retries"""
+        flight = SingleFlight()
+
+        def failing():
+            time.sleep(0.2)
+            raise RuntimeError("database unavailable")
+
+        def call():
+            try:
+                return flight.do("key", failing)
+            except RuntimeError as exc:
+                return str(exc)
+
+        assert run_concurrently(5, call) == ["database unavailable"] * 5
+        assert flight.do("key", lambda: "recovered") == "recovered"
+
+    def test_each_waiter_raises_its_own_exception(self):
+        """Test waiters get distinct exception objects chained to the leader's"""
+        flight = SingleFlight()
+
+        def failing():
+            time.sleep(0.2)
+            raise RuntimeError("database unavailable")
+
+        def call():
+            try:
+                flight.do("key", failing)
+            except RuntimeError as exc:
+                return exc
+
+        errors = run_concurrently(5, call)
+        assert len({id(error) for error in errors}) == 5
+        leaders = [error for error in errors if error.__cause__ is None]
+        assert len(leaders) == 1
+        assert all(error.__cause__ is leaders[0] for error in errors if error is not leaders[0])
+
+    def test_uncopyable_exception_is_wrapped(self):
+        """Test an exception that cannot be copied reaches waiters as SharedCallError"""
+        class Uncopyable(Exception):
+            def __init__(self, code):
+                super().__init__()
+                self.code = code
+
+            def __reduce_ex__(self, protocol):
+                raise TypeError("cannot copy")
+
+        flight = SingleFlight()
+
+        def failing():
+            time.sleep(0.2)
+            raise Uncopyable(42)
+
+        def call():
+            try:
+                flight.do("key", failing)
+            except Exception as exc:
+                return exc
+
+        errors = run_concurrently(3, call)
+        assert sum(isinstance(error, Uncopyable) for error in errors) == 1
+        wrapped = [error for error in errors if isinstance(error, SharedCallError)]
+        assert len(wrapped) == 2
+        assert all(isinstance(error.__cause__, Uncopyable) for error in wrapped)
+
+    def test_forget_starts_a_new_call(self):
+        """Test callers arriving after forget() do not join an older call"""
+        flight = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+
+        def old():
+            started.set()
+            release.wait()
+            return "old"
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            future = executor.submit(flight.do, "key", old)
+            started.wait()
+            flight.forget()
+            assert flight.do("key", lambda: "new") == "new"
+            release.set()
+            assert future.result() == "old"
+
+    def test_calls_during_write_are_not_shared(self):
+        """Test calls made while a write commits neither join nor lead a shared call"""
+        flight = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+
+        def old():
+            started.set()
+            release.wait(timeout=5)
+            return "old"
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            before = executor.submit(flight.do, "key", old)
+            assert started.wait(timeout=5)
+            with flight.writing():
+                assert flight.do("key", lambda: "during") == "during"
+                # Would otherwise become a shared call holding pre-commit data
+                during = executor.submit(flight.do, "key", lambda: "own")
+                assert during.result(timeout=5) == "own"
+            assert flight.do("key", lambda: "after") == "after"
+            release.set()
+            assert before.result() == "old"
+
+class TestAsyncSingleFlight:
+    """Test coalescing of coroutines"""
+
+    def test_concurrent_awaits_share_one_execution(self):
+        """Test identical in-flight coroutines run once"""
+        flight = SingleFlight()
+        calls = []
+
+        async def slow():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return "result"
+
+        async def main():
+            return await asyncio.gather(*(flight.do_async("key", slow) for _ in range(10)))
+
+        assert asyncio.run(main()) == ["result"] * 10
+        assert len(calls) == 1
+
+    def test_errors_reach_every_waiter(self):
+        """Test all waiters see the shared coroutine's exception"""
+        flight = SingleFlight()
+
+        async def failing():
+            await asyncio.sleep(0.05)
+            raise RuntimeError("database unavailable")
+
+        async def main():
+            return await asyncio.gather(
+                *(flight.do_async("key", failing) for _ in range(3)), return_exceptions=True
+            )
+
+        results = asyncio.run(main())
+        assert all(isinstance(result, RuntimeError) for result in results)
+        assert len({id(result) for result in results}) == 3
+        assert len({id(result.__cause__) for result in results}) == 1
+
+    def test_cancelled_waiter_does_not_cancel_others(self):
+        """Test cancelling one waiter leaves the shared call running for the rest"""
+        flight = SingleFlight()
+
+        async def slow():
+            await asyncio.sleep(0.1)
+            return "result"
+
+        async def main():
+            first = asyncio.ensure_future(flight.do_async("key", slow))
+            second = asyncio.ensure_future(flight.do_async("key", slow))
+            await asyncio.sleep(0.01)
+            first.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await first
+            return await second
+
+        assert asyncio.run(main()) == "result"
+
+    def test_last_waiter_cancelled_cancels_call(self):
+        """Test the shared coroutine is cancelled once nobody is waiting for it"""
+        flight = SingleFlight()
+        finished = []
+
+        async def slow():
+            await asyncio.sleep(0.1)
+            finished.append(1)
+
+        async def main():
+            waiter = asyncio.ensure_future(flight.do_async("key", slow))
+            await asyncio.sleep(0.01)
+            waiter.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await waiter
+            await asyncio.sleep(0.2)
+
+        asyncio.run(main())
+        assert finished == []
+
+class TestCoalescedReads:
+    """Test identical concurrent API reads share one query"""
+
+    def test_concurrent_list_requests_share_one_query(self, client, created_task, monkeypatch):
+        """Test a burst of identical list requests runs get_tasks once"""
+        get_tasks = crud.get_tasks
+        calls = []
+
+        def slow_get_tasks(db, **kwargs):
+            calls.append(kwargs)
+            time.sleep(0.2)
+            return get_tasks(db, **kwargs)
+
+        monkeypatch.setattr(crud, "get_tasks", slow_get_tasks)
+        responses = run_concurrently(8, lambda: client.get("/tasks/?limit=10"))
+
+        assert len(calls) == 1
+        assert all(response.status_code == status.HTTP_200_OK for response in responses)
+        assert all(response.json() == [created_task] for response in responses)
+
+    def test_write_during_read_starts_a_new_query(self, client, created_task, monkeypatch):
+        """Test a read issued after a write commits does not join a read from before it"""
+        get_task = crud.get_task
+        started = threading.Event()
+        release = threading.Event()
+
+        def blocking_get_task(db, task_id):
+            task = get_task(db, task_id)
+            if not started.is_set():
+                started.set()
+                release.wait(timeout=2)
+            return task
+
+        monkeypatch.setattr(crud, "get_task", blocking_get_task)
+        path = f"/tasks/{created_task['id']}"
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            stale = executor.submit(client.get, path)
+            assert started.wait(timeout=5)
+            client.put(path, json={"title": "Updated"})
+            assert client.get(path).json()["title"] == "Updated"
+            release.set()
+            assert stale.result().json()["title"] == created_task["title"]
+
+    def test_import_commits_inside_writing(self, db_session, monkeypatch):
+        """Test an import chunk's tasks are committed inside task_reads.writing()"""
+        job = crud.create_import_job(db_session, "tasks.ndjson", ImportFormat.NDJSON, 0, "")
+        commit = db_session.commit
+        commits = []
+
+        def recording_commit():
+            commits.append(crud.task_reads._writes)
+            commit()
+
+        monkeypatch.setattr(db_session, "commit", recording_commit)
+        record = {"title": "Task", "status": "todo", "due_date": "2025-12-31T10:00:00"}
+        importer.import_chunk(db_session, job, [(1, record)])
+        # Tasks commit while the write is registered; job progress does not
+        assert commits == [1, 0]
+
+    def test_read_after_write_is_fresh(self, client, created_task):
+        """Test a read issued after a write sees the write"""
+        client.put(f"/tasks/{created_task['id']}", json={"title": "Updated"})
+        assert client.get(f"/tasks/{created_task['id']}").json()["title"] == "Updated"